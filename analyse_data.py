@@ -7,30 +7,28 @@ benchmark interest rate (if any) is used.
 
 import logging
 import re
+from collections import Counter
 from datetime import datetime, timedelta
+from functools import lru_cache
 from typing import Tuple, Union, Optional, Iterable
-from copy import deepcopy
 
-from dateutil import parser as dateparser
+import numpy as np
+
 from dateutil.tz import tzutc
 
 from lxml import etree
 
 import benchmark_data
 
+# Per-tracker benchmark aggregates are stored as parallel arrays (one
+# slot per benchmark) rather than a dict of dicts; BM_INDEX maps each
+# benchmark name to its slot.
+BM_INDEX = {name: i for i, name in enumerate(benchmark_data.benchmark_names)}
+NUM_BENCHMARKS = len(benchmark_data.benchmark_names)
+
 TZUTC = tzutc()
 TODAY_UTC = datetime.utcnow().replace(tzinfo=TZUTC)
 TODAY = datetime.today()
-ZERO_TIME = timedelta()
-
-# For testing purposes only
-TO_CHECK = {
-    'SONA',
-    'SFOR',
-    'LONDON INTERBANK MARKET',
-    '1DAY USD SECURED OVERNIGH',
-    'OFFERED RATE'
-}
 
 
 ### Structure of a FIRDS XML file
@@ -79,19 +77,50 @@ TO_CHECK = {
 
 day = timedelta(days=1)
 
-def find_by_isin(isin: str, elems: Iterable[etree._Element]) -> etree._Element:
-    for e in elems:
-        if get_isin(e) == isin:
-            return e
+_WORD_SPLIT = re.compile(r'[ \-+]')
+
+def _isoparse(text: str) -> datetime:
+    """Parse an ISO-8601 timestamp with datetime.fromisoformat, which
+    is implemented in C and much faster than dateutil's parser.  Older
+    Pythons don't accept a trailing 'Z', so rewrite it as an offset.
+    """
+    if text.endswith('Z'):
+        text = text[:-1] + '+00:00'
+    return datetime.fromisoformat(text)
+
+# Compiled XPath objects are much cheaper to evaluate repeatedly than
+# ad-hoc .xpath() calls, so build them once at module level.  Matching
+# on local-name() keeps them independent of the document's namespace.
+_FIRST_TRADE_XPATH = etree.XPath('*[local-name()="FrstTradDt"]/text()')
+_TERMINATION_XPATH = etree.XPath('*[local-name()="TermntnDt"]/text()')
+
+def index_by_isin(elems: Iterable[etree._Element]) -> dict:
+    """Build an ISIN -> element index once, so each subsequent lookup
+    is a dict hit rather than a scan over every element.
+    """
+    return {get_isin(e): e for e in elems}
+
+def find_by_isin(isin: str, elems: Iterable[etree._Element]) -> Optional[etree._Element]:
+    """Look up a single element by ISIN.  elems may be a prebuilt
+    index_by_isin dict; anything else is indexed first, so callers
+    doing repeated lookups should build the index themselves.
+    """
+    if not isinstance(elems, dict):
+        elems = index_by_isin(elems)
+    return elems.get(isin)
 
 def get_isin(elem: etree._Element) -> str:
     return elem[0][0].text
       
+@lru_cache(maxsize=8192)
+def _parse_maturity_date(text: str) -> datetime:
+    # fromisoformat handles the plain '%Y-%m-%d' format and is far
+    # quicker than strptime; maturity dates also repeat heavily across
+    # issues, so cache the parsed values.
+    return datetime.fromisoformat(text).replace(tzinfo=TZUTC)
+
 def get_maturity_date(elem:etree._Element) -> datetime:
-    mat_date = datetime.strptime(elem[3][1].text, '%Y-%m-%d')
-    if mat_date.tzinfo is None:
-        mat_date = mat_date.replace(tzinfo=TZUTC)
-    return mat_date
+    return _parse_maturity_date(elem[3][1].text)
     
 def get_maturity(elem: etree._Element, from_date: datetime = TODAY_UTC) -> float:
     maturity = ((get_maturity_date(elem) - from_date) / day) / 354.25
@@ -108,16 +137,16 @@ def get_tv_dates(elem: etree._Element) -> Tuple[datetime, datetime]:
     tv_data = elem[2]
     first_trade = None
     termination = None
-    for datum in tv_data:
-        # TODO:  Using xpath would probably be quicker for this
-        if datum.tag.endswith('}FrstTradDt'):
-            first_trade = dateparser.isoparse(datum.text)
-            if first_trade.tzinfo is None:
-                first_trade = first_trade.replace(tzinfo=TZUTC)
-        elif datum.tag.endswith('}TermntnDt'):
-            termination = dateparser.isoparse(datum.text)
-            if termination.tzinfo is None:
-                termination = termination.replace(tzinfo=TZUTC)
+    ft_text = _FIRST_TRADE_XPATH(tv_data)
+    if ft_text:
+        first_trade = _isoparse(ft_text[0])
+        if first_trade.tzinfo is None:
+            first_trade = first_trade.replace(tzinfo=TZUTC)
+    term_text = _TERMINATION_XPATH(tv_data)
+    if term_text:
+        termination = _isoparse(term_text[0])
+        if termination.tzinfo is None:
+            termination = termination.replace(tzinfo=TZUTC)
     return first_trade, termination
 
 def get_nominal_amount(elem: etree._Element) -> float:
@@ -131,19 +160,28 @@ def get_currency(elem: etree._Element, convert_DEM: bool = True) -> str:
         return currency
 
 def get_interest_rate(elem: etree._Element) -> dict:
-    ir_elem = elem[3][3][0]
+    return _parse_interest_rate(elem[3][3])
+
+def _parse_interest_rate(ir_elem: etree._Element) -> dict:
+    ir_elem = ir_elem[0]
     ir_data = {}
-    if ir_elem.tag.endswith('}Fxd'):
+    tag = ir_elem.tag.rpartition('}')[2]
+    if tag == 'Fxd':
         ir_data['fixed_floating'] = 'fixed'
         ir_data['rate'] = ir_elem.text
-    elif ir_elem.tag.endswith('}Fltg'):
+    elif tag == 'Fltg':
         ir_data['fixed_floating'] = 'floating'
         ref_rate = ir_elem[0]
-        if ref_rate[0].tag.endswith('}Nm'):
+        ref_tag = ref_rate[0].tag.rpartition('}')[2]
+        if ref_tag == 'Nm':
             ir_data['index_name'] = ref_rate[0].text
-        elif ref_rate[0].tag.endswith('}ISIN'):
+            if ir_data['index_name']:
+                # Cache the normalised form; the matching functions may
+                # be called several times with the same ir_data.
+                ir_data['_name_upper'] = ir_data['index_name'].upper()
+        elif ref_tag == 'ISIN':
             ir_data['index_isin'] = ref_rate[0].text
-        elif ref_rate[0].tag.endswith('}Indx'):
+        elif ref_tag == 'Indx':
             ir_data['index_code'] = ref_rate[0].text
         ir_data['term'] = (ir_elem[1][0].text, float(ir_elem[1][1].text))
         ir_data['spread'] = float(ir_elem[2].text)
@@ -154,6 +192,57 @@ def get_interest_rate(elem: etree._Element) -> dict:
 def is_floating(elem: etree._Element) -> bool:
     return get_interest_rate(elem)['fixed_floating'] == 'floating'
 
+def parse_ref_data(elem: etree._Element) -> dict:
+    """Walk the children of a RefData element once, pulling out all the
+    data we are interested in and returning it as a plain dict.  This
+    avoids re-traversing the element tree for each individual datum
+    (which is what calling each of the above getter functions in turn
+    would involve).
+    """
+    data = {
+        'isin': None,
+        'currency': None,
+        'maturity_date': None,
+        'nominal': None,
+        'first_trade': None,
+        'termination': None,
+        'ir_data': None
+    }
+    for child in elem:
+        tag = child.tag.rpartition('}')[2]
+        if tag == 'FinInstrmGnlAttrbts':
+            for attr in child:
+                attr_tag = attr.tag.rpartition('}')[2]
+                if attr_tag == 'Id':
+                    data['isin'] = attr.text
+                elif attr_tag == 'NtnlCcy':
+                    data['currency'] = attr.text
+        elif tag == 'TradgVnRltdAttrbts':
+            for attr in child:
+                attr_tag = attr.tag.rpartition('}')[2]
+                if attr_tag == 'FrstTradDt':
+                    first_trade = _isoparse(attr.text)
+                    if first_trade.tzinfo is None:
+                        first_trade = first_trade.replace(tzinfo=TZUTC)
+                    data['first_trade'] = first_trade
+                elif attr_tag == 'TermntnDt':
+                    termination = _isoparse(attr.text)
+                    if termination.tzinfo is None:
+                        termination = termination.replace(tzinfo=TZUTC)
+                    data['termination'] = termination
+        elif tag == 'DebtInstrmAttrbts':
+            for attr in child:
+                attr_tag = attr.tag.rpartition('}')[2]
+                if attr_tag == 'TtlIssdNmnlAmt':
+                    data['nominal'] = float(attr.text)
+                elif attr_tag == 'MtrtyDt':
+                    data['maturity_date'] = _parse_maturity_date(attr.text)
+                elif attr_tag == 'IntrstRate':
+                    data['ir_data'] = _parse_interest_rate(attr)
+    if data['currency'] == 'DEM':
+        data['currency'] = 'EUR'
+    return data
+
 def print_details(elem: etree._Element, float_only: bool = False):
     if not float_only:
         if get_interest_rate(elem)['fixed_floating'] != 'floating':
@@ -176,13 +265,18 @@ def is_benchmark(bm_data: dict, ir_data: dict, check_code: bool = True) -> Tuple
         return True, 'isin'
     if not name:
         return False, None
-    name = name.upper()
-    if (name in bm_data['names'] | bm_data['isins']) or (name == bm_data['code']):
+    name = ir_data.get('_name_upper')
+    if name is None:
+        name = ir_data['index_name'].upper()
+        ir_data['_name_upper'] = name
+    if (name in bm_data['names']) or (name in bm_data['isins']) or (name == bm_data['code']):
         # Check if index_name is one of the benchmark's recognised names, or is one of the benchmark's
         # recognised ISINs or is the benchmark's code (the latter two happen sometimes)
         return True, 'name'
-    if any(all(word.upper() in re.split('[ \-+]', name) for word in root_name) for root_name in bm_data['root_names']):
-        bm_data['names'].add(name)
+    words = frozenset(w for w in _WORD_SPLIT.split(name) if w)
+    if any(root_name.issubset(words) for root_name in bm_data['root_names']):
+        # names is a frozenset, so rebind rather than mutate in place
+        bm_data['names'] = bm_data['names'] | {name}
         return True, 'root_name'
     return False, None
 
@@ -210,11 +304,23 @@ def is_libor(ir_data: dict, currency: str, libors: Tuple[dict] = benchmark_data.
                 return bm_currency, match_type
     return False, None
 
-def get_benchmark(ir_data: dict, currency: str, libors: Tuple[dict] = benchmark_data.libors,
-                    non_libors: dict = benchmark_data.non_libors,
-                    isin: str = None) -> Tuple[Optional[str], Optional[str]]:
-    
+def _classify_uncached(name: Optional[str], code: Optional[str], index_isin: Optional[str],
+                        currency: str, libors: Tuple[dict],
+                        non_libors: dict) -> Tuple[Optional[str], Optional[str], Optional[str]]:
+
+    # Scan each benchmark in turn against the supplied structures,
+    # which also handles matching (and recording) new names by their
+    # root words.
     benchmark = None
+    bm_currency = None
+    ir_data = {}
+    if name:
+        ir_data['index_name'] = name
+        ir_data['_name_upper'] = name.upper()
+    if code:
+        ir_data['index_code'] = code
+    if index_isin:
+        ir_data['index_isin'] = index_isin
     libor_currency, match_type = is_libor(ir_data, currency, libors)
     if libor_currency:
         benchmark = ' '.join((libor_currency, 'LIBOR'))
@@ -226,7 +332,63 @@ def get_benchmark(ir_data: dict, currency: str, libors: Tuple[dict] = benchmark_
                 benchmark = bm
                 bm_currency = non_libors[bm]['currency']
                 break
-    
+
+    if benchmark is None:
+        return None, None, None
+    return benchmark, match_type, bm_currency
+
+@lru_cache(maxsize=100_000)
+def _classify(name: Optional[str], code: Optional[str], index_isin: Optional[str],
+                currency: str) -> Tuple[Optional[str], Optional[str], Optional[str]]:
+    """Cached classification against the module-level benchmark data.
+    FIRDS files repeat the same few index names/codes across vast
+    numbers of ISINs, so in practice nearly every call after the first
+    few is a cache hit.
+    """
+    # Fast path:  most securities identify their benchmark by one of
+    # the recognised names, codes or ISINs, all of which are in the
+    # reverse-lookup dicts built by benchmark_data at import time.
+    # Those dicts describe the module-level benchmark data, which is
+    # all this function ever classifies against; callers with their
+    # own structures go through _classify_uncached directly.
+    hit = None
+    match_type = None
+    if name:
+        name_upper = name.upper()
+        hit = benchmark_data.NAME_TO_BM.get(name_upper) or benchmark_data.ISIN_TO_BM.get(name_upper)
+        match_type = 'name'
+    if (hit is None) and index_isin:
+        hit = benchmark_data.ISIN_TO_BM.get(index_isin)
+        match_type = 'isin'
+    if (hit is None) and code:
+        hit = benchmark_data.NAME_TO_BM.get(code)
+        match_type = 'code'
+    if hit is not None:
+        benchmark, bm_currency = hit
+        if bm_currency is not None:
+            return benchmark, match_type, bm_currency
+        # Matched LIBOR generically; guess the currency from the
+        # security itself (see the comments in is_libor).  If the
+        # guess fails, fall through to the scan, which applies the
+        # same treatment but may still match a non-LIBOR benchmark.
+        if currency in benchmark_data.libor_currencies:
+            return ' '.join((currency, 'LIBOR')), match_type, currency
+    return _classify_uncached(name, code, index_isin, currency,
+                                benchmark_data.libors, benchmark_data.non_libors)
+
+def get_benchmark(ir_data: dict, currency: str, libors: Tuple[dict] = benchmark_data.libors,
+                    non_libors: dict = benchmark_data.non_libors,
+                    isin: str = None) -> Tuple[Optional[str], Optional[str]]:
+
+    name = ir_data.get('index_name')
+    code = ir_data.get('index_code')
+    index_isin = ir_data.get('index_isin')
+    if (libors is benchmark_data.libors) and (non_libors is benchmark_data.non_libors):
+        benchmark, match_type, bm_currency = _classify(name, code, index_isin, currency)
+    else:
+        # Caller-supplied benchmark data can't safely share the cache.
+        benchmark, match_type, bm_currency = _classify_uncached(
+            name, code, index_isin, currency, libors, non_libors)
     if benchmark is not None:
         if (isin is not None) and (bm_currency != currency):
             # Security has matched a specific currency LIBOR, but that does not match the
@@ -236,87 +398,281 @@ def get_benchmark(ir_data: dict, currency: str, libors: Tuple[dict] = benchmark_
     else:
         return None, None
 
-TRACKER_PROTOTYPE = {
-    'last_isin': None,
-    'floating': 0,
-    'fixed': 0,
-    'floating_uncat': {
-        'index_name': {},
-        'index_code': {},
-        'index_isin': {}
-    },
-    'benchmark_data': {bm: {
-            'count': 0,
-            'agg_maturity': 0,
-            'agg_nominal': 0,
-            'agg_mxn': 0
-        } for bm in benchmark_data.benchmark_names},
-    'duplicates': 0,
-    'matured': 0,
-    'delisted': 0,
-    'zero_nominal': 0
-}
-
 def init_tracker() -> dict:
-    return deepcopy(TRACKER_PROTOTYPE)
+    # Build the nested containers fresh on each call; copying a
+    # prototype would either share them (shallow copy) or pay for a
+    # full recursive traversal (deepcopy).
+    return {
+        'seen_isins': set(),
+        'floating': 0,
+        'fixed': 0,
+        'floating_uncat': {
+            'index_name': Counter(),
+            'index_code': Counter(),
+            'index_isin': Counter()
+        },
+        'counts': np.zeros(NUM_BENCHMARKS, dtype=np.int64),
+        'agg_maturity': np.zeros(NUM_BENCHMARKS, dtype=np.float64),
+        'agg_nominal': np.zeros(NUM_BENCHMARKS, dtype=np.float64),
+        'agg_mxn': np.zeros(NUM_BENCHMARKS, dtype=np.float64),
+        'duplicates': 0,
+        'matured': 0,
+        'delisted': 0,
+        'zero_nominal': 0
+    }
+
+def merge_tracker(dst: dict, src: dict) -> None:
+    """Fold the contents of one tracker into another in place.  Lets
+    callers aggregate worker results one at a time as they arrive,
+    rather than holding every tracker in memory first.
+    """
+    for k in ('floating', 'fixed', 'duplicates', 'matured', 'delisted', 'zero_nominal'):
+        dst[k] += src[k]
+    for k in ('counts', 'agg_maturity', 'agg_nominal', 'agg_mxn'):
+        dst[k] += src[k]
+    dst['seen_isins'] |= src['seen_isins']
+    for k in src['floating_uncat']:
+        # Counter addition sums the per-worker counts; dict.update
+        # would just overwrite them.
+        dst['floating_uncat'][k] += src['floating_uncat'][k]
 
 def aggregate_trackers(trackers: Iterable) -> dict:
     agg = init_tracker()
-    for k in ('floating', 'fixed', 'duplicates', 'matured', 'delisted', 'zero_nominal'):
-        agg[k] = sum(t[k] for t in trackers)
-    for bm in agg['benchmark_data']:
-        agg['benchmark_data'][bm]['count'] = sum(t['benchmark_data'][bm]['count'] for t in trackers)
-        agg['benchmark_data'][bm]['agg_nominal'] = sum(t['benchmark_data'][bm]['agg_nominal'] for t in trackers)
-        agg['benchmark_data'][bm]['agg_maturity'] = sum(t['benchmark_data'][bm]['agg_maturity'] for t in trackers)
-        agg['benchmark_data'][bm]['agg_mxn'] = sum(t['benchmark_data'][bm]['agg_mxn'] for t in trackers)
     for t in trackers:
-        for k in t['floating_uncat']:
-            agg['floating_uncat'][k].update(t['floating_uncat'][k])
+        merge_tracker(agg, t)
     return agg
 
 def parse_security(s, tracker: dict, libors: Tuple[dict] = benchmark_data.libors,
                     non_libors: dict = benchmark_data.non_libors,
                     assess_date: datetime = TODAY_UTC) -> None:
-    _, term_date = get_tv_dates(s)
+    parse_security_data(parse_ref_data(s), tracker, libors, non_libors, assess_date)
+
+def parse_security_data(data: dict, tracker: dict, libors: Tuple[dict] = benchmark_data.libors,
+                        non_libors: dict = benchmark_data.non_libors,
+                        assess_date: datetime = TODAY_UTC) -> None:
+    term_date = data['termination']
     if (term_date is not None) and (term_date < assess_date):
         tracker['delisted'] += 1
         return
-    isin = get_isin(s)
-    if isin == tracker['last_isin']:
+    isin = data['isin']
+    seen_isins = tracker['seen_isins']
+    if isin in seen_isins:
         tracker['duplicates'] += 1
         return
-    tracker['last_isin'] = isin
-    maturity = get_maturity(s, from_date=assess_date)
+    seen_isins.add(isin)
+    maturity = ((data['maturity_date'] - assess_date) / day) / 354.25
     if maturity < 0:
         tracker['matured'] += 1
         return
-    nominal_amount = get_nominal_amount(s)
+    nominal_amount = data['nominal']
     if nominal_amount == 0.0:
         tracker['zero_nominal'] += 1
         return
-    ir_data = get_interest_rate(s)
-    currency = get_currency(s)
+    ir_data = data['ir_data']
+    currency = data['currency']
     if ir_data['fixed_floating'] == 'floating':
         tracker['floating'] += 1
         bm, match_type = get_benchmark(ir_data, currency, libors, non_libors)
-        if bm == 'HKD LIBOR':
-            print(isin)
-            print(ir_data)
         if bm:
-            tracker['benchmark_data'][bm]['count'] += 1
-            tracker['benchmark_data'][bm]['agg_maturity'] += maturity
-            tracker['benchmark_data'][bm]['agg_nominal'] += nominal_amount
-            tracker['benchmark_data'][bm]['agg_mxn'] += maturity * nominal_amount
+            i = BM_INDEX[bm]
+            tracker['counts'][i] += 1
+            tracker['agg_maturity'][i] += maturity
+            tracker['agg_nominal'][i] += nominal_amount
+            tracker['agg_mxn'][i] += maturity * nominal_amount
         else:
             for identifier in ('index_isin', 'index_name', 'index_code'):
                 if identifier in ir_data:
-                    tracker['floating_uncat'][identifier][ir_data[identifier]] = tracker['floating_uncat'][identifier].get(ir_data[identifier], 0) + 1
+                    tracker['floating_uncat'][identifier][ir_data[identifier]] += 1
     else:
         tracker['fixed'] += 1
 
+# The leaf elements we extract, keyed by localname with the localname
+# of the parent they must appear under (some tags, eg Id, also appear
+# elsewhere in a RefData element with a different meaning).
+_LEAF_PARENTS = {
+    'Id': 'FinInstrmGnlAttrbts',
+    'NtnlCcy': 'FinInstrmGnlAttrbts',
+    'FrstTradDt': 'TradgVnRltdAttrbts',
+    'TermntnDt': 'TradgVnRltdAttrbts',
+    'TtlIssdNmnlAmt': 'DebtInstrmAttrbts',
+    'MtrtyDt': 'DebtInstrmAttrbts',
+    'Fxd': 'IntrstRate',
+    'Nm': 'RefRate',
+    'ISIN': 'RefRate',
+    'Indx': 'RefRate',
+    'Unit': 'Term',
+    'Val': 'Term',
+    'BsisPtSprd': 'Fltg'
+}
+
+class _RefDataTarget:
+    """lxml parser target which assembles the per-security data dicts
+    directly from the parser events and hands each one to
+    parse_security_data as soon as its RefData element closes.  Unlike
+    iterparse, this never builds _Element objects at all, which is a
+    significant saving given how few of the elements in a FIRDS file we
+    actually look at.
+    """
+
+    def __init__(self, tracker: dict, libors: Tuple[dict] = benchmark_data.libors,
+                    non_libors: dict = benchmark_data.non_libors,
+                    assess_date: datetime = TODAY_UTC):
+        self.tracker = tracker
+        self.libors = libors
+        self.non_libors = non_libors
+        self.assess_date = assess_date
+        self._stack = []
+        self._data = None      # current security's dict, inside RefData
+        self._ir_data = None   # current security's ir_data, inside Fltg
+        self._chunks = None    # text chunks of the current leaf of interest
+        self._skip_ir = False  # ignore the current IntrstRate subtree
+        # Qualified tag -> localname.  lxml reuses the same qualified
+        # tag strings across events, so after the first few records
+        # every event resolves its localname with one dict hit (on an
+        # already-hashed string) instead of a scan for the '}'.
+        self._localnames = {}
+
+    def _localname(self, tag):
+        local = self._localnames.get(tag)
+        if local is None:
+            local = tag.rpartition('}')[2]
+            self._localnames[tag] = local
+        return local
+
+    def start(self, tag, attrib):
+        local = self._localname(tag)
+        if self._data is not None:
+            if self._skip_ir:
+                pass
+            elif local == 'IntrstRate':
+                # Cheap filters first:  if the record is going to be
+                # discarded as delisted or matured anyway, don't bother
+                # extracting the interest rate subtree (the most
+                # expensive part of the record).
+                rd = self._data
+                term = rd['termination']
+                mat = rd['maturity_date']
+                if (((term is not None) and (term < self.assess_date))
+                        or ((mat is not None) and (mat < self.assess_date))):
+                    self._skip_ir = True
+            elif _LEAF_PARENTS.get(local) == self._stack[-1]:
+                self._chunks = []
+            elif local == 'Fltg':
+                self._ir_data = {'fixed_floating': 'floating'}
+        elif local == 'RefData':
+            self._data = {
+                'isin': None,
+                'currency': None,
+                'maturity_date': None,
+                'nominal': None,
+                'first_trade': None,
+                'termination': None,
+                'ir_data': None
+            }
+        self._stack.append(local)
+
+    def data(self, text):
+        if self._chunks is not None:
+            self._chunks.append(text)
+
+    def end(self, tag):
+        local = self._localname(tag)
+        self._stack.pop()
+        rd = self._data
+        if rd is None:
+            return
+        chunks = self._chunks
+        if chunks is not None:
+            self._chunks = None
+            text = ''.join(chunks)
+            if local == 'Id':
+                rd['isin'] = text
+            elif local == 'NtnlCcy':
+                rd['currency'] = 'EUR' if text == 'DEM' else text
+            elif local == 'MtrtyDt':
+                rd['maturity_date'] = _parse_maturity_date(text)
+            elif local == 'TtlIssdNmnlAmt':
+                rd['nominal'] = float(text)
+            elif local == 'FrstTradDt':
+                first_trade = _isoparse(text)
+                if first_trade.tzinfo is None:
+                    first_trade = first_trade.replace(tzinfo=TZUTC)
+                rd['first_trade'] = first_trade
+            elif local == 'TermntnDt':
+                termination = _isoparse(text)
+                if termination.tzinfo is None:
+                    termination = termination.replace(tzinfo=TZUTC)
+                rd['termination'] = termination
+            elif local == 'Fxd':
+                rd['ir_data'] = {'fixed_floating': 'fixed', 'rate': text or None}
+            elif local == 'Nm':
+                self._ir_data['index_name'] = text
+                self._ir_data['_name_upper'] = text.upper()
+            elif local == 'ISIN':
+                self._ir_data['index_isin'] = text
+            elif local == 'Indx':
+                self._ir_data['index_code'] = text
+            elif local == 'Unit':
+                self._ir_data['_term_unit'] = text
+            elif local == 'Val':
+                self._ir_data['_term_val'] = float(text)
+            elif local == 'BsisPtSprd':
+                self._ir_data['spread'] = float(text)
+        elif local == 'Fltg':
+            ir_data = self._ir_data
+            if ir_data is not None:
+                ir_data['term'] = (ir_data.pop('_term_unit', None),
+                                   ir_data.pop('_term_val', None))
+                rd['ir_data'] = ir_data
+                self._ir_data = None
+        elif local == 'RefData':
+            self._data = None
+            self._skip_ir = False
+            self._handle_record(rd)
+
+    def _handle_record(self, rd):
+        parse_security_data(rd, self.tracker, self.libors,
+                            self.non_libors, self.assess_date)
+
+    def close(self):
+        self._stack.clear()
+        self._data = None
+        self._ir_data = None
+        self._chunks = None
+        self._skip_ir = False
+
+class _RefDataCollector(_RefDataTarget):
+    """Variant of _RefDataTarget which collects the per-security dicts
+    rather than classifying them as they arrive.
+    """
+
+    def __init__(self):
+        super().__init__(tracker=None)
+        self.records = []
+
+    def _handle_record(self, rd):
+        self.records.append(rd)
+
 def parse_file(fpath, tracker: dict, libors: Tuple[dict] = benchmark_data.libors,
                 non_libors: dict = benchmark_data.non_libors) -> None:
-    for event, elem in etree.iterparse(fpath):
-        if elem.tag.endswith('}RefData'):
-            parse_security(elem, tracker, libors, non_libors)
-            elem.clear()
+    parser = etree.XMLParser(target=_RefDataTarget(tracker, libors, non_libors),
+                             huge_tree=True)
+    etree.parse(fpath, parser)
+
+def extract_file(fpath) -> list:
+    """Parse a FIRDS file into a list of per-security data dicts
+    without classifying them.  Together with classify_records this
+    splits parse_file into its parse and classify stages, for callers
+    that want to distribute classification over batches of records.
+    """
+    target = _RefDataCollector()
+    parser = etree.XMLParser(target=target, huge_tree=True)
+    etree.parse(fpath, parser)
+    return target.records
+
+def classify_records(records: Iterable[dict], tracker: dict,
+                        libors: Tuple[dict] = benchmark_data.libors,
+                        non_libors: dict = benchmark_data.non_libors,
+                        assess_date: datetime = TODAY_UTC) -> None:
+    for rd in records:
+        parse_security_data(rd, tracker, libors, non_libors, assess_date)
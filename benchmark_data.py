@@ -6,8 +6,9 @@ which is used by the is_benchmark and is_libor functions in analyse_data
 to check what benchmark rate (if any) is used by a given security.
 """
 
+import itertools
+
 from typing import Tuple
-from copy import deepcopy
 
 libor_currencies = {'GBP', 'EUR', 'USD', 'CHF', 'JPY'}
 
@@ -292,6 +293,50 @@ non_libors = {
     },
 }
 
+# Normalise the benchmark data once at import time so the matching code
+# in analyse_data doesn't have to:  names are uppercased and frozen,
+# ISINs frozen, and each root_names entry becomes a frozenset of
+# uppercase words so matching is a subset check rather than a scan.
+for _bm in itertools.chain(libors, non_libors.values()):
+    _bm['names'] = frozenset(n.upper() for n in _bm['names'])
+    _bm['isins'] = frozenset(_bm['isins'])
+    _bm['root_names'] = tuple(
+        frozenset(w.upper() for w in ((rn,) if isinstance(rn, str) else rn))
+        for rn in _bm['root_names']
+    )
+del _bm
+
+# Reverse lookups from recognised names, codes and ISINs to the display
+# label and currency of the relevant benchmark, so that in the common
+# case classifying a security is a single dict lookup rather than a
+# scan over every benchmark.  The generic LIBOR entry (and the 'LIBO'
+# code, which is shared by every LIBOR) map to a None currency; callers
+# must guess the LIBOR currency from the security itself.
+NAME_TO_BM = {}
+ISIN_TO_BM = {}
+for _bm in libors:
+    if _bm['currency'] is None:
+        _label = 'LIBOR'
+    else:
+        _label = ' '.join((_bm['currency'], 'LIBOR'))
+    for _name in _bm['names']:
+        NAME_TO_BM[_name] = (_label, _bm['currency'])
+    for _isin in _bm['isins']:
+        ISIN_TO_BM[_isin] = (_label, _bm['currency'])
+NAME_TO_BM['LIBO'] = ('LIBOR', None)
+# setdefault so that, as in the scanning path (which tries the LIBORs
+# first), libors win when both claim the same key -- eg '180DAY EUR'
+# is both an EUR LIBOR and a EURIBOR name once uppercased.
+for _label in non_libors:
+    _bm = non_libors[_label]
+    for _name in _bm['names']:
+        NAME_TO_BM.setdefault(_name, (_label, _bm['currency']))
+    if _bm['code']:
+        NAME_TO_BM.setdefault(_bm['code'], (_label, _bm['currency']))
+    for _isin in _bm['isins']:
+        ISIN_TO_BM.setdefault(_isin, (_label, _bm['currency']))
+del _bm, _label, _name, _isin
+
 benchmark_names = [' '.join((bm['currency'], 'LIBOR')) for bm in libors if bm['currency'] is not None] \
                     + sorted(non_libors.keys())
 
@@ -304,8 +349,24 @@ replacements = {
     'EONIA': 'ESTR'
 }
 
+def clone_libors() -> Tuple[dict]:
+    # Cheap isolated copies for callers that want to alter or
+    # accumulate against the benchmark data without touching the shared
+    # templates.  Only the top-level dicts need to be fresh (new names
+    # are recorded by rebinding 'names'); the frozen collections inside
+    # are simply aliased, so this is a few dict copies rather than the
+    # recursive traversal a deepcopy would do.
+    return tuple({**bm} for bm in libors)
+
+def clone_non_libors() -> dict:
+    return {name: {**bm} for name, bm in non_libors.items()}
+
 def get_libors() -> Tuple[dict]:
-    return deepcopy(libors)
+    # The normalization pass above freezes all the nested collections,
+    # so the module-level structures can be shared safely; there is no
+    # need to deepcopy them for each caller.  (Newly discovered names
+    # are recorded by rebinding a fresh frozenset, never by mutating.)
+    return libors
 
 def get_non_libors() -> dict:
-    return deepcopy(non_libors)
+    return non_libors
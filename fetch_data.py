@@ -4,10 +4,11 @@
 """Functions for fetching the FIRDS XML files from ESMA's website.""" 
 
 import logging
+import pickle
 from zipfile import ZipFile
 from io import BytesIO
 from datetime import datetime, timedelta
-from os import mkdir, listdir, remove
+from os import mkdir, makedirs, scandir, remove
 from os.path import join, exists, dirname, realpath
 from typing import Optional, List, Dict, Sequence, Tuple
 
@@ -54,20 +55,32 @@ def _parse_file_urls(root: etree._Element, urls: dict, ftype: str = ''):
             else:
                 urls[date] = [url]
 
-def get_file_urls(from_date: datetime = None, to_date: datetime = None, ftype: str = '') -> Dict[datetime, List[str]]:
-    
+def get_file_urls(from_date: datetime = None, to_date: datetime = None, ftype: str = '',
+                    cache_dir: Optional[str] = None) -> Dict[datetime, List[str]]:
+
     start = 0
     rows = 100
-    
+
     if from_date is None:
         to_date = datetime.today()
         from_date = to_date - timedelta(weeks=1)
     elif to_date is None:
         to_date = from_date
-    
+
+    # The register is queried a page at a time, so a full date range
+    # costs several HTTP round trips.  Results for a historical range
+    # don't change, so cache them on disk keyed by type and dates.
+    if cache_dir is not None:
+        cache_file = join(cache_dir, '{}_{}_{}.pkl'.format(ftype or 'all',
+                from_date.strftime('%Y%m%d'), to_date.strftime('%Y%m%d')))
+        if exists(cache_file):
+            logging.info('Loading cached file URLs from {}.'.format(cache_file))
+            with open(cache_file, 'rb') as f:
+                return pickle.load(f)
+
     logging.info('Getting files of type "{}" from {} to {}.'.format(ftype,
             from_date.strftime('%Y-%m-%d'), to_date.strftime('%Y-%m-%d')))
-        
+
     root = _request_file_urls(from_date, to_date, start, rows)
     num_results = int(root[1].attrib['numFound'])
     logging.info('Returned XML has {} results out of {} total.'.format(len(root[1]), num_results))
@@ -79,7 +92,12 @@ def get_file_urls(from_date: datetime = None, to_date: datetime = None, ftype: s
         logging.info('Getting results {}-{} of {}.'.format(start, start+rows, num_results))
         root = _request_file_urls(from_date, to_date, start, rows)
         _parse_file_urls(root, urls, ftype)
-    
+
+    if cache_dir is not None:
+        makedirs(cache_dir, exist_ok=True)
+        with open(cache_file, 'wb') as f:
+            pickle.dump(urls, f)
+
     return urls
     
 def download_zipped_file(url: str, to_dir: str = None) -> str:
@@ -93,27 +111,30 @@ def download_zipped_file(url: str, to_dir: str = None) -> str:
     return join(to_dir, name)
     
 def get_xml_files(ftype: str = '', data_dir: Optional[str] = None,
-                    from_date: Optional[datetime] = None, 
+                    from_date: Optional[datetime] = None,
                     to_date: Optional[datetime] = None,
-                    force_dl: bool = False) -> Dict[datetime, List[str]]:
+                    force_dl: bool = False,
+                    cache_dir: Optional[str] = None) -> Dict[datetime, List[str]]:
     logging.info('Getting FIRDS XML files.')
-    urls = get_file_urls(from_date, to_date, ftype=ftype)
+    urls = get_file_urls(from_date, to_date, ftype=ftype, cache_dir=cache_dir)
     if data_dir is None:
         data_dir = DATA_DIR
     fpaths = {}
     for date in urls:
         date_dir = join(data_dir, date.strftime('%Y%m%d'))
         if exists(date_dir):
-            date_files = [join(date_dir, f) for f in listdir(date_dir)]
+            # scandir gives the name and full path in one directory
+            # pass, without a stat or join per entry.
             if force_dl:
-                for f in date_files:
-                    remove(f)
-                    fpaths[date] = [download_zipped_file(url, date_dir) for url in urls[date]]
+                with scandir(date_dir) as entries:
+                    for entry in entries:
+                        remove(entry.path)
+                fpaths[date] = [download_zipped_file(url, date_dir) for url in urls[date]]
             else:
-                fpaths[date] = list(filter(
-                    lambda f: f.startswith(FNAME_START.format(ftype)) and f.endswith('.xml'),
-                    date_files
-                ))
+                prefix = FNAME_START.format(ftype)
+                with scandir(date_dir) as entries:
+                    fpaths[date] = [entry.path for entry in entries
+                                    if entry.name.startswith(prefix) and entry.name.endswith('.xml')]
         else:
             mkdir(date_dir)
             fpaths[date] = [download_zipped_file(url, date_dir) for url in urls[date]]
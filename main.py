@@ -8,32 +8,40 @@ aggregated data about the benchmark rates.
 """
 
 import multiprocessing as mp
-import csv
 import logging
 
-from multiprocessing.managers import ListProxy
-from copy import deepcopy
+import numpy as np
+
 from typing import Optional, Tuple, Iterator
 from datetime import datetime, timedelta
-from os import makedirs
-from os.path import join, expanduser, exists, dirname
+from queue import Queue
+from threading import Thread
+from concurrent.futures import ThreadPoolExecutor
+from os import makedirs, cpu_count, fsync
+from os.path import join, expanduser, dirname
 from shutil import rmtree
+from types import MappingProxyType
 
 import fetch_data
 import analyse_data
 
-from benchmark_data import benchmark_names, get_libors, get_non_libors
+from benchmark_data import (benchmark_names, get_libors, get_non_libors,
+                            clone_libors, clone_non_libors)
 
 START_DATE = datetime(2018, 1, 1)
 END_DATE = datetime(2020, 5, 31)
 OUTPUT_DIR = join(expanduser('~'), 'data', 'bmir_data')
 REPORTS_DIR = join(OUTPUT_DIR, 'reports')
-if not exists(REPORTS_DIR):
-    makedirs(REPORTS_DIR)
+CACHE_DIR = join(OUTPUT_DIR, 'cache')
+makedirs(REPORTS_DIR, exist_ok=True)
 CSV_FILE = join(OUTPUT_DIR, 'bmir_data.csv')
 
+# Read-only templates.  The underlying structures are shared with
+# benchmark_data (names are frozensets, rebound rather than mutated
+# when new ones are found); the proxy stops accidental writes here.
+# Use clone_libors/clone_non_libors for a mutable copy.
 INITIAL_LIBORS = get_libors()
-INITIAL_NON_LIBORS = get_non_libors()
+INITIAL_NON_LIBORS = MappingProxyType(get_non_libors())
 
 LABELS = ('COUNT', 'AVERAGE MATURITY', 'WEIGHTED AVERAGE MATURITY', 'AVERAGE NOMINAL AMOUNT')
 CSV_HEADINGS = ['DATE']
@@ -43,6 +51,18 @@ for name in benchmark_names:
     for label in LABELS:
         CSV_HEADINGS.append('{} - {}'.format(label, name))
 
+# Array slot for each benchmark, resolved once at import so the weekly
+# row loop doesn't repeat the name lookups.  Slots follow
+# benchmark_names order, matching CSV_HEADINGS above.
+BM_SLOTS = tuple(analyse_data.BM_INDEX[name] for name in benchmark_names)
+_BM_SLOT_ARR = np.array(BM_SLOTS, dtype=np.intp)
+
+# None of the headings or values need quoting (the only non-numeric
+# field is the ISO date), so rows are emitted with a prebuilt format
+# string rather than going through csv.writer's per-field quoting.
+# %.12g keeps full useful precision without printing long float tails.
+ROW_FMT = '%s' + ',%.12g' * (len(CSV_HEADINGS) - 1) + '\n'
+
 #for libor in INITIAL_LIBORS:
 #    for label in LABELS:
 #        CSV_HEADINGS.append('{} - {} LIBOR'.format(label, libor['currency']))
@@ -67,149 +87,228 @@ def parse_debt_files_non_mp():
     return tracker
 
 def parse_file(fpath: str,
-                tracker_list: ListProxy,
-                libors_list: ListProxy,
-                non_libors_list: ListProxy,
                 libors: Optional[Tuple[dict]] = None,
-                non_libors: Optional[dict] = None):
+                non_libors: Optional[dict] = None) -> Tuple[dict, Tuple[dict], dict]:
     libors = libors or get_libors()
     non_libors = non_libors or get_non_libors()
     tracker = analyse_data.init_tracker()
-    
-    analyse_data.parse_file(fpath, tracker, libors, deepcopy(non_libors))
-    tracker_list.append(tracker)
-    libors_list.append(libors)
-    non_libors_list.append(non_libors)
+
+    analyse_data.parse_file(fpath, tracker, libors, non_libors)
+    return tracker, libors, non_libors
+
+# Benchmark data for the worker processes, set once per pool by
+# _init_worker rather than pickled and shipped with every task.
+_worker_libors = None
+_worker_non_libors = None
+
+def _init_worker(libors: Optional[Tuple[dict]], non_libors: Optional[dict]):
+    global _worker_libors, _worker_non_libors
+    _worker_libors = libors
+    _worker_non_libors = non_libors
+
+def _parse_file_worker(fpath: str) -> Tuple[dict, Tuple[frozenset], dict]:
+    libors = _worker_libors or get_libors()
+    non_libors = _worker_non_libors or get_non_libors()
+    # Snapshot the name sets before parsing so we only ship back the
+    # names this file added, not the full benchmark structures.  The
+    # 'names' frozensets are rebound (never mutated in place) when a
+    # new name is found, so aliasing them here is safe.
+    libor_names = tuple(l['names'] for l in libors)
+    non_libor_names = {bm_name: non_libors[bm_name]['names'] for bm_name in non_libors}
+    tracker = analyse_data.init_tracker()
+    analyse_data.parse_file(fpath, tracker, libors, non_libors)
+    libor_deltas = tuple(l['names'] - old for l, old in zip(libors, libor_names))
+    non_libor_deltas = {bm_name: non_libors[bm_name]['names'] - non_libor_names[bm_name]
+                        for bm_name in non_libors}
+    return tracker, libor_deltas, non_libor_deltas
+
+def _collect_results(pool: 'mp.pool.Pool', files,
+                     libors: Optional[Tuple[dict]] = None,
+                     non_libors: Optional[dict] = None) -> Tuple[dict, Tuple[dict], dict]:
+    # Workers return their results directly; appending to Manager
+    # proxies pickled every result and shipped it through a separate
+    # server process.  Each result is folded into the running
+    # aggregate as it arrives, so peak memory stays at one tracker
+    # rather than one per file.
+    agg_tracker = analyse_data.init_tracker()
+    agg_libors = tuple({**l} for l in libors) if libors else clone_libors()
+    agg_non_libors = ({bm_name: {**bm} for bm_name, bm in non_libors.items()}
+                      if non_libors else clone_non_libors())
+    for tracker, libor_deltas, non_libor_deltas in pool.imap_unordered(_parse_file_worker, files):
+        analyse_data.merge_tracker(agg_tracker, tracker)
+        # Each process will have accumulated additional names to associate
+        # with each benchmark rate.  Collect these together as results
+        # arrive so we can record them (and sense-check them).
+        for bm, new_names in zip(agg_libors, libor_deltas):
+            if new_names:
+                bm['names'] |= new_names
+        for bm_name in non_libor_deltas:
+            if non_libor_deltas[bm_name]:
+                agg_non_libors[bm_name]['names'] |= non_libor_deltas[bm_name]
+
+    return agg_tracker, agg_libors, agg_non_libors
 
 def parse_multi_files(files,
                       libors: Optional[Tuple[dict]] = None,
-                      non_libors: Optional[dict] = None) -> Tuple[ListProxy]:
-    
-    # Shaves about 1 minute (~33%) off time vs non-multiprocessing
-    
-    manager = mp.Manager()
-    pool = mp.Pool(processes=len(files))
-
-    #tracker = manager.dict(analyse_data.init_tracker())
-    tracker_list = manager.list()
-    libors_list = manager.list()
-    non_libors_list = manager.list()
-
-    pool.starmap(parse_file, 
-                 ((fpath, tracker_list, libors_list, non_libors_list,
-                   libors, non_libors) for fpath in files))
-    pool.close()
-    pool.join()
-    
-    agg_tracker = analyse_data.aggregate_trackers(tracker_list)
-    
-    # Each process will have accumulated additional names to associate with
-    # each benchmark rate.  Collect these together so we can record them (and
-    # sense-check them).
-    agg_libors = libors_list[0]
-    for _libors in libors_list[1:]:
-        for i, j in zip(agg_libors, _libors):
-            i['names'] |= j['names']
-    agg_non_libors = non_libors_list[0]
-    for non_libor in non_libors_list[1:]:
-        for bm_name in non_libor:
-            agg_non_libors[bm_name]['names'] |= non_libor[bm_name]['names']
-    
-    return agg_tracker, agg_libors, agg_non_libors
+                      non_libors: Optional[dict] = None,
+                      pool: Optional['mp.pool.Pool'] = None) -> Tuple[dict, Tuple[dict], dict]:
+
+    # A long-lived pool (already initialized with _init_worker) can be
+    # passed in so the workers are reused across calls; build_csv
+    # creates one for the whole run rather than forking a fresh set of
+    # workers every week.  Otherwise, size a throwaway pool by the CPUs
+    # available rather than forking one process per file.
+    if pool is not None:
+        return _collect_results(pool, files, libors, non_libors)
+    with mp.Pool(processes=min(len(files), cpu_count()),
+                 initializer=_init_worker,
+                 initargs=(libors, non_libors)) as pool:
+        return _collect_results(pool, files, libors, non_libors)
+
+# Report writing happens off the main loop so the next week's parse
+# isn't held up by file I/O; one worker keeps the writes in order.
+_report_pool = ThreadPoolExecutor(max_workers=1)
 
 def save_report(date: datetime, tracker: dict,
                 libors: Tuple[dict], non_libors: dict) -> str:
     gen_time = datetime.today()
     fname = '{}.log'.format(date.strftime('%Y-%m-%d'))
     fpath = join(REPORTS_DIR, fname)
+    # Build the whole report in memory and write it in one call rather
+    # than issuing dozens of small writes through the io stack.
+    parts = ['Report for parsing FIRDS XML data from {}.'
+                'Generated on {}.\n'.format(
+                    date.strftime('%d-%m-%Y'),
+                    gen_time.strftime('%d-%m-%Y at %H:%M'))]
+    # Each section is joined into a single sorted block rather than
+    # appended item by item.
+    def section(items):
+        if items:
+            parts.append('    ' + '\n    '.join(sorted(items)) + '\n')
+    parts.append('\n')
+    parts.append('Uncategorised floating interest rates:\n')
+    parts.append('  Names:\n')
+    section(tracker['floating_uncat']['index_name'])
+    parts.append('  ISINs:\n')
+    section(tracker['floating_uncat']['index_isin'])
+    parts.append('  Codes:\n')
+    section(tracker['floating_uncat']['index_code'])
+    parts.append('\n')
+    parts.append('LIBOR names:\n')
+    for libor in libors:
+        c = libor['currency'] or 'Generic'
+        parts.append('  {}:\n'.format(c))
+        section(libor['names'])
+    parts.append('\n')
+    parts.append('Non-LIBOR benchmark rate names:\n')
+    for non_libor in non_libors:
+        parts.append('  {}:\n'.format(non_libor))
+        section(non_libors[non_libor]['names'])
     with open(fpath, 'w') as f:
-        f.write('Report for parsing FIRDS XML data from {}.'
-                    'Generated on {}.\n'.format(
-                        date.strftime('%d-%m-%Y'),
-                        gen_time.strftime('%d-%m-%Y at %H:%M')))
-        f.write('\n')
-        f.write('Uncategorised floating interest rates:\n')
-        f.write('  Names:\n')
-        for name in tracker['floating_uncat']['index_name']:
-            f.write('    {}\n'.format(name))
-        f.write('  ISINs:\n')
-        for isin in tracker['floating_uncat']['index_name']:
-            f.write('    {}\n'.format(isin))
-        f.write('  Codes:\n')
-        for code in tracker['floating_uncat']['index_code']:
-            f.write('    {}\n'.format(code))
-        f.write('\n')
-        f.write('LIBOR names:\n')
-        for libor in libors:
-            c = libor['currency'] or 'Generic'
-            f.write('  {}:\n'.format(c))
-            for name in libor['names']:
-                f.write('    {}\n'.format(name))
-        f.write('\n')
-        f.write('Non-LIBOR benchmark rate names:\n')
-        for non_libor in non_libors:
-            f.write('  {}:\n'.format(non_libor))
-            for name in non_libors[non_libor]['names']:
-                f.write('    {}\n'.format(name))
+        f.write(''.join(parts))
     return fpath
 
-def build_csv(new_file: bool = True, report: bool = True):
+def _fetch_weeks(file_queue: Queue, cache_dir: Optional[str] = None):
+    # Producer for build_csv:  downloads each week's files while the
+    # consumer parses the previous week, so the HTTP fetches overlap
+    # the XML parsing.  The bounded queue keeps at most a couple of
+    # weeks of files on disk ahead of the parser, and FIFO order means
+    # the CSV rows still come out in date order.  A fetch failure is
+    # passed down the queue and re-raised by the consumer, so it ends
+    # the run with a traceback rather than leaving build_csv blocked
+    # on a queue that will never be fed again.
+    try:
+        for from_date, to_date in iter_dates(START_DATE, END_DATE, timedelta(days=7)):
+            to_date -= timedelta(days=1)
+            from_date_hr = from_date.strftime('%d-%m-%Y')
+            to_date_hr = to_date.strftime('%d-%m-%Y')
+            logging.info('Searching for XML files in date range {} to {}.'.format(from_date_hr, to_date_hr))
+            file_queue.put(fetch_data.get_xml_files(ftype='D', from_date=from_date,
+                                                    to_date=to_date, force_dl=True,
+                                                    cache_dir=cache_dir))
+    except Exception as e:
+        file_queue.put(e)
+    else:
+        file_queue.put(None)
+
+def build_csv(new_file: bool = True, report: bool = True, use_cache: bool = True):
     run_time = datetime.today()
     logging.info('Beginning to build CSV on {}.'.format(run_time.strftime('%d-%m-%Y at %H:%M')))
     tracker = analyse_data.init_tracker()
     libors = INITIAL_LIBORS
     non_libors = INITIAL_NON_LIBORS
-    with open(CSV_FILE, 'w', newline='') as f:
-        writer = csv.writer(f)
+    # Append rather than clobber when continuing an existing file.
+    with mp.Pool(processes=cpu_count(),
+                 initializer=_init_worker,
+                 initargs=(None, None)) as pool, \
+            open(CSV_FILE, 'w' if new_file else 'a') as f:
         if new_file:
-            f.truncate()
-            writer.writerow(CSV_HEADINGS)
+            f.write(','.join(CSV_HEADINGS) + '\n')
             logging.info('Wrote header row to blank CSV file {}.'.format(CSV_FILE))
         else:
             logging.info('Continuing with existing CSV file {}.'.format(CSV_FILE))
-        for from_date, to_date in iter_dates(START_DATE, END_DATE, timedelta(days=7)):
-            to_date -= timedelta(days=1)
-            from_date_hr = from_date.strftime('%d-%m-%Y')
-            to_date_hr = to_date.strftime('%d-%m-%Y')
-            logging.info('Searching for XML files in date range {} to {}.'.format(from_date_hr, to_date_hr))
-            files = fetch_data.get_xml_files(ftype='D', from_date=from_date, to_date=to_date, force_dl=True)
+        file_queue = Queue(maxsize=2)
+        fetcher = Thread(target=_fetch_weeks,
+                         args=(file_queue, CACHE_DIR if use_cache else None),
+                         daemon=True)
+        fetcher.start()
+        report_futures = []
+        while True:
+            files = file_queue.get()
+            if files is None:
+                break
+            if isinstance(files, Exception):
+                raise files
             for date in files:
-                logging.info('Found {} files from date {}'.format(len(files[date]), date.strftime('%d-%m-%Y')))
-                tracker, libors, non_libors = parse_multi_files(files[date])
+                # Format each date once; both forms get reused below.
+                date_ymd = date.strftime('%Y-%m-%d')
+                date_dmy = date.strftime('%d-%m-%Y')
+                logging.info('Found {} files from date {}'.format(len(files[date]), date_dmy))
+                tracker, libors, non_libors = parse_multi_files(files[date], pool=pool)
                 if report:
-                    report_path = save_report(date, tracker, libors, non_libors)
-                    logging.info('Report saved to {}.'.format(report_path))
-                bm_data = tracker['benchmark_data']
-                values = [date.strftime('%Y-%m-%d')]
-                # NB:  Values must be appended in same order as LABELS.  
-                for name in benchmark_names:
-                    count = bm_data[name]['count']
-                    agg_maturity = bm_data[name]['agg_maturity']
-                    agg_nominal = bm_data[name]['agg_nominal']
-                    agg_mxn = bm_data[name]['agg_mxn']
-                    values.append(count)
-                    try:
-                        values.append(agg_maturity / count)
-                    except ZeroDivisionError:
-                        values.append(0)
-                    try:
-                        values.append(agg_mxn / agg_nominal)
-                    except ZeroDivisionError:
-                        values.append(0)
-                    try:
-                        values.append(agg_nominal / count)
-                    except ZeroDivisionError:
-                        values.append(0)
-                writer.writerow(values)
+                    # tracker/libors/non_libors are rebound (never
+                    # mutated) on the next iteration, so handing them
+                    # to the report thread is safe.
+                    report_futures.append(_report_pool.submit(
+                        save_report, date, tracker, libors, non_libors))
+                # Compute all benchmarks at once; the where= masks
+                # leave 0 in slots whose divisor is zero, matching the
+                # old per-benchmark guards.  _BM_SLOT_ARR puts the
+                # tracker arrays into CSV column order.
+                counts = tracker['counts'][_BM_SLOT_ARR]
+                agg_maturity = tracker['agg_maturity'][_BM_SLOT_ARR]
+                agg_nominal = tracker['agg_nominal'][_BM_SLOT_ARR]
+                agg_mxn = tracker['agg_mxn'][_BM_SLOT_ARR]
+                nonzero = counts > 0
+                avg_maturity = np.divide(agg_maturity, counts,
+                                         out=np.zeros_like(agg_maturity), where=nonzero)
+                wavg_maturity = np.divide(agg_mxn, agg_nominal,
+                                          out=np.zeros_like(agg_mxn), where=agg_nominal > 0)
+                avg_nominal = np.divide(agg_nominal, counts,
+                                        out=np.zeros_like(agg_nominal), where=nonzero)
+                # NB:  Columns must be stacked in same order as LABELS.
+                row = np.column_stack((counts, avg_maturity, wavg_maturity, avg_nominal)).ravel()
+                values = [date_ymd]
+                values.extend(row.tolist())
+                # The divisions above are guarded, so no value here can
+                # be NaN or infinite.
+                f.write(ROW_FMT % tuple(values))
+                # One row per week, so syncing after each write is
+                # cheap and means completed weeks survive a crash
+                # mid-run.
+                f.flush()
+                fsync(f.fileno())
                 logging.info('Wrote data to CSV file.')
                 dirpath = dirname(files[date][0]) 
                 rmtree(dirpath, ignore_errors=True)
                 logging.info('Removed directory {}.'.format(dirpath))
+        for future in report_futures:
+            logging.info('Report saved to {}.'.format(future.result()))
 
 
 def main(args):
     logging.getLogger().setLevel(20)
-    build_csv()
+    build_csv(use_cache='--no-cache' not in args)
 
 if __name__ == '__main__':
     import sys